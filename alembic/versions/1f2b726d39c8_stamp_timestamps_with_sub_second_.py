@@ -0,0 +1,85 @@
+"""stamp timestamps with sub-second precision
+
+Revision ID: 1f2b726d39c8
+Revises: 67aed2cee053
+Create Date: 2026-10-15 06:40:42.890787
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "1f2b726d39c8"
+down_revision: Union[str, Sequence[str], None] = "67aed2cee053"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+DB_NOW = sa.text("(strftime('%Y-%m-%d %H:%M:%f000', 'now'))")
+
+# Columns stamped by the database on insert: (table, columns)
+STAMPED_COLUMNS = (
+    ("users", ("created_at", "updated_at")),
+    ("authors", ("created_at",)),
+    ("books", ("created_at", "updated_at")),
+)
+
+# SQLite can only change a column default by rebuilding the table, which
+# drops the FTS5 sync triggers on it: (table, indexed columns)
+FTS_COLUMNS = {
+    "users": ("name", "email"),
+    "authors": ("name", "nationality", "biography"),
+    "books": ("title",),
+}
+
+
+def create_fts_triggers(source: str, columns: Sequence[str]) -> None:
+    fts = f"{source}_fts"
+    cols = ", ".join(columns)
+    new_values = ", ".join(f"new.{c}" for c in columns)
+    old_values = ", ".join(f"old.{c}" for c in columns)
+
+    op.execute(
+        f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {source} BEGIN "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_values}); "
+        "END"
+    )
+    op.execute(
+        f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {source} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) "
+        f"VALUES ('delete', old.id, {old_values}); "
+        "END"
+    )
+    op.execute(
+        f"CREATE TRIGGER {fts}_au AFTER UPDATE ON {source} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) "
+        f"VALUES ('delete', old.id, {old_values}); "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_values}); "
+        "END"
+    )
+
+
+def set_server_default(server_default) -> None:
+    for table, columns in STAMPED_COLUMNS:
+        with op.batch_alter_table(table) as batch_op:
+            for column in columns:
+                batch_op.alter_column(
+                    column,
+                    existing_type=sa.DateTime(),
+                    existing_nullable=False,
+                    server_default=server_default,
+                )
+        create_fts_triggers(table, FTS_COLUMNS[table])
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    set_server_default(DB_NOW)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    set_server_default(None)
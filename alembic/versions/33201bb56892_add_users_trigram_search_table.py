@@ -0,0 +1,60 @@
+"""add users trigram search table
+
+Revision ID: 33201bb56892
+Revises: 86c1abcafa38
+Create Date: 2026-10-15 06:21:39.694025
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "33201bb56892"
+down_revision: Union[str, Sequence[str], None] = "86c1abcafa38"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# External-content FTS5 table using the trigram tokenizer, so that
+# substring (LIKE '%q%' style) searches are served from the index
+COLUMNS = ("name", "email")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    cols = ", ".join(COLUMNS)
+    new_values = ", ".join(f"new.{c}" for c in COLUMNS)
+    old_values = ", ".join(f"old.{c}" for c in COLUMNS)
+
+    op.execute(
+        f"CREATE VIRTUAL TABLE users_fts USING fts5("
+        f"{cols}, content='users', content_rowid='id', tokenize='trigram')"
+    )
+    op.execute(
+        "CREATE TRIGGER users_fts_ai AFTER INSERT ON users BEGIN "
+        f"INSERT INTO users_fts(rowid, {cols}) VALUES (new.id, {new_values}); "
+        "END"
+    )
+    op.execute(
+        "CREATE TRIGGER users_fts_ad AFTER DELETE ON users BEGIN "
+        f"INSERT INTO users_fts(users_fts, rowid, {cols}) "
+        f"VALUES ('delete', old.id, {old_values}); "
+        "END"
+    )
+    op.execute(
+        "CREATE TRIGGER users_fts_au AFTER UPDATE ON users BEGIN "
+        f"INSERT INTO users_fts(users_fts, rowid, {cols}) "
+        f"VALUES ('delete', old.id, {old_values}); "
+        f"INSERT INTO users_fts(rowid, {cols}) VALUES (new.id, {new_values}); "
+        "END"
+    )
+    # Index the rows that already exist
+    op.execute("INSERT INTO users_fts(users_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for suffix in ("ai", "ad", "au"):
+        op.execute(f"DROP TRIGGER IF EXISTS users_fts_{suffix}")
+    op.execute("DROP TABLE IF EXISTS users_fts")
@@ -1,38 +1,165 @@
 # File: auth.py (Simplified Authentication utilities)
+import asyncio
+import hashlib
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait
+from functools import lru_cache
 from typing import Optional
 
-from passlib.context import CryptContext
-from sqlmodel import Session, select
+import bcrypt
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
+from cachetools import TTLCache
+from fastapi.concurrency import run_in_threadpool
+from sqlmodel import Session, bindparam, exists, select
 
 from app.database import User
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing (argon2id). Hashes created before the switch are bcrypt
+# ("$2b$..."); they still verify and are upgraded on the next successful login.
+ph = PasswordHasher(time_cost=3, memory_cost=7168, parallelism=1)
+BCRYPT_PREFIX = "$2"
+# bcrypt only reads the first 72 bytes of a password
+BCRYPT_MAX_PASSWORD_BYTES = 72
 
+# Password hashing is deliberately CPU-bound, so it runs in worker processes
+# instead of occupying the request threadpool or blocking the event loop.
+HASH_WORKERS = os.cpu_count() or 1
+_hash_pool: Optional[ProcessPoolExecutor] = None
+_hash_pool_lock = threading.Lock()
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+# Memoized verification results, keyed by a digest of password + hash so the
+# plaintext never sits in memory. A password change produces a new salted hash,
+# so stale entries can never be hit again and simply expire.
+_verify_cache = TTLCache(maxsize=4096, ttl=60)
+_verify_cache_lock = threading.Lock()
+
+# Login and email-check lookups, built at import so each request skips
+# constructing the select and its cache key
+_user_by_email_query = select(User).where(User.email == bindparam("email"))
+_email_exists_query = select(exists().where(User.email == bindparam("email")))
+
+
+def _verify_cache_key(plain_password: str, hashed_password: str) -> str:
+    return hashlib.sha256(
+        plain_password.encode() + b"|" + hashed_password.encode()
+    ).hexdigest()
+
+
+def _verify_password(plain_password: str, hashed_password: str) -> bool:
+    try:
+        if hashed_password.startswith(BCRYPT_PREFIX):
+            return bcrypt.checkpw(
+                plain_password.encode("utf-8")[:BCRYPT_MAX_PASSWORD_BYTES],
+                hashed_password.encode("utf-8"),
+            )
+        return ph.verify(hashed_password, plain_password)
+    except (VerificationError, InvalidHashError, ValueError):
+        # A malformed stored hash fails the login instead of raising a 500
+        return False
+
+
+def _hash_password(password: str) -> str:
+    return ph.hash(password)
+
+
+@lru_cache(maxsize=4096)
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Check if a hash is legacy bcrypt or uses outdated argon2 parameters"""
+    if hashed_password.startswith(BCRYPT_PREFIX):
+        return True
+    return ph.check_needs_rehash(hashed_password)
+
+
+def get_hash_pool() -> ProcessPoolExecutor:
+    """Get the hashing worker pool, starting a new one after a shutdown"""
+    global _hash_pool
+    with _hash_pool_lock:
+        if _hash_pool is None:
+            _hash_pool = ProcessPoolExecutor(max_workers=HASH_WORKERS)
+        return _hash_pool
+
+
+def shutdown_hash_pool() -> None:
+    """Stop the hashing workers; the next hash starts a fresh pool"""
+    global _hash_pool
+    with _hash_pool_lock:
+        pool, _hash_pool = _hash_pool, None
+    if pool is not None:
+        pool.shutdown()
+
+
+def warm_hash_pool() -> None:
+    """Start every hashing worker so the first logins don't pay process startup"""
+    pool = get_hash_pool()
+    dummy_hash = _hash_password("warm-up")
+    wait(
+        [
+            pool.submit(_verify_password, "warm-up", dummy_hash)
+            for _ in range(HASH_WORKERS)
+        ]
+    )
+
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
-    return pwd_context.verify(plain_password, hashed_password)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_hash_pool(), _verify_password, plain_password, hashed_password
+    )
+
 
+async def verify_password_cached(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password, reusing recent results for the same password and hash"""
+    key = _verify_cache_key(plain_password, hashed_password)
+    with _verify_cache_lock:
+        result = _verify_cache.get(key)
+    if result is None:
+        result = await verify_password(plain_password, hashed_password)
+        with _verify_cache_lock:
+            _verify_cache[key] = result
+    return result
 
-def get_password_hash(password: str) -> str:
+
+async def get_password_hash(password: str) -> str:
     """Hash a password"""
-    return pwd_context.hash(password)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_hash_pool(), _hash_password, password)
 
 
-def authenticate_user(session: Session, email: str, password: str) -> Optional[User]:
+async def authenticate_user(
+    session: Session, email: str, password: str
+) -> Optional[User]:
     """Authenticate user with email and password"""
-    user = session.exec(select(User).where(User.email == email)).first()
+    user = await run_in_threadpool(_get_user_for_login, session, email)
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    if not await verify_password_cached(password, user.hashed_password):
         return None
     if not user.is_active:
         return None
+    if password_needs_rehash(user.hashed_password):
+        user.hashed_password = await get_password_hash(password)
+        session.add(user)
+        await run_in_threadpool(session.commit)
+    return user
+
+
+def _get_user_for_login(session: Session, email: str) -> Optional[User]:
+    # End the read transaction before the password check, so the connection
+    # and its WAL snapshot aren't held for the whole KDF run. Commit rather
+    # than rollback: with expire_on_commit=False the user stays loaded.
+    user = get_user_by_email(session, email)
+    session.commit()
     return user
 
 
+def get_user_by_email(session: Session, email: str) -> Optional[User]:
+    """Look up a user by email"""
+    return session.exec(_user_by_email_query, params={"email": email}).first()
+
+
 def check_email_exists(session: Session, email: str) -> bool:
     """Check if email already exists in database"""
-    existing_user = session.exec(select(User).where(User.email == email)).first()
-    return existing_user is not None
+    return bool(session.exec(_email_exists_query, params={"email": email}).first())
@@ -1,6 +1,10 @@
-from datetime import date, datetime
+from contextlib import ExitStack
+from datetime import UTC, date, datetime
 from typing import List, Optional
 
+from pydantic import ConfigDict, EmailStr
+from sqlalchemy import DateTime, Index, Integer, TypeDecorator, column, event, table
+from sqlalchemy.ext.hybrid import hybrid_method
 from sqlmodel import (
     Column,
     Field,
@@ -8,14 +12,88 @@ from sqlmodel import (
     Session,
     SQLModel,
     String,
+    and_,
+    case,
+    cast,
     create_engine,
+    func,
+    text,
 )
 
-from app.schema import AuthorSchema, BookSchema, BorrowRecordSchema, UserSchema
+from app.schema import (
+    AuthorSchema,
+    BookSchema,
+    BorrowRecordSchema,
+    UserSchema,
+    utc_now,
+)
+from app.settings import settings
 
 # Database setup
 DATABASE_URL = "sqlite:///./data/dev.db"
-engine = create_engine(DATABASE_URL, echo=True)
+engine = create_engine(
+    DATABASE_URL,
+    echo=settings.SQL_ECHO,
+    query_cache_size=1200,
+    # One connection per concurrent request; SQLite is local, so pre-ping and
+    # recycling (for dropped server connections) are not needed
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    connect_args={
+        "check_same_thread": False,
+        # Prepared statements kept per connection (sqlite3 default 128), so
+        # hot lookups are parsed and planned once rather than per request
+        "cached_statements": 512,
+    },
+)
+
+SQLITE_PRAGMAS = (
+    "journal_mode=WAL",
+    "synchronous=NORMAL",
+    "temp_store=MEMORY",
+    "mmap_size=268435456",
+    "cache_size=-65536",
+    "foreign_keys=ON",
+)
+
+
+@event.listens_for(engine, "connect")
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Tune every new SQLite connection (WAL, relaxed fsync, bigger caches)"""
+    cursor = dbapi_connection.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(f"PRAGMA {pragma}")
+    cursor.close()
+
+
+def warm_db_pool():
+    """Open pool_size connections up front so early requests don't pay for them"""
+    with ExitStack() as stack:
+        for _ in range(settings.DB_POOL_SIZE):
+            stack.enter_context(engine.connect()).execute(text("SELECT 1"))
+
+
+class UTCDateTime(TypeDecorator):
+    """DateTime stored as naive UTC (SQLite has no timestamptz), read back aware"""
+
+    impl = DateTime
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone(UTC).replace(tzinfo=None)
+        return value
+
+    def process_result_value(self, value, dialect):
+        if value is not None:
+            value = value.replace(tzinfo=UTC)
+        return value
+
+
+# CURRENT_TIMESTAMP only has whole seconds. Keep SQLite's milliseconds, padded
+# to the microsecond format DateTime stores, so stamps sort with stored values
+DB_NOW = func.strftime("%Y-%m-%d %H:%M:%f000", "now")
 
 
 def create_db_and_tables():
@@ -25,20 +103,75 @@ def create_db_and_tables():
 
 def get_session():
     """Get database session"""
-    with Session(engine) as session:
+    # Objects keep their loaded state after commit, so handlers can return what
+    # they just wrote without a refresh SELECT
+    with Session(engine, expire_on_commit=False) as session:
         yield session
 
 
+def get_today() -> date:
+    """Get the current date once per request"""
+    return date.today()
+
+
+# FTS5 indexes mirroring authors/books, kept in sync by triggers (see
+# migrations). Only the columns needed to join and MATCH are declared.
+authors_fts = table("authors_fts", column("rowid"), column("authors_fts"))
+books_fts = table("books_fts", column("rowid"), column("books_fts"))
+# Trigram-tokenized, for substring search over users.name / users.email
+users_fts = table("users_fts", column("rowid"), column("users_fts"))
+# The trigram tokenizer cannot match anything shorter than one trigram
+TRIGRAM_MIN_LENGTH = 3
+
+
+def fts_match_query(q: str, column_name: Optional[str] = None) -> str:
+    """Build an FTS5 query matching every word of q as a prefix"""
+    terms = " ".join('"{}"*'.format(word.replace('"', '""')) for word in q.split())
+    terms = terms or '""'
+    if column_name:
+        return f"{column_name} : ({terms})"
+    return terms
+
+
+def fts_substring_query(q: str) -> str:
+    """Build a trigram FTS5 query matching q anywhere in the indexed text"""
+    return '"{}"'.format(q.replace('"', '""'))
+
+
 class User(UserSchema, table=True):
     __tablename__ = "users"
+    # Match the (name, id) keyset order used to page through users, with and
+    # without the role / is_active filters
+    __table_args__ = (
+        Index("ix_users_name_id", "name", "id"),
+        Index("ix_users_role_is_active_name_id", "role", "is_active", "name", "id"),
+    )
+    # Read the database-stamped created_at / updated_at back with RETURNING, so
+    # using them after a flush doesn't trigger a refresh SELECT
+    __mapper_args__ = {"eager_defaults": True}
 
     id: Optional[int] = Field(default=None, primary_key=True)
+    email: EmailStr = Field(unique=True, index=True)
     hashed_password: str = Field(sa_column=Column(String, nullable=False))
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: Optional[datetime] = Field(
+        default=None,
+        nullable=False,
+        sa_type=UTCDateTime,
+        sa_column_kwargs={"server_default": DB_NOW},
+    )
+    updated_at: Optional[datetime] = Field(
+        default=None,
+        nullable=False,
+        sa_type=UTCDateTime,
+        sa_column_kwargs={"server_default": DB_NOW, "onupdate": DB_NOW},
+    )
 
     # Relationships
-    borrow_records: List["BorrowRecord"] = Relationship(back_populates="user")
+    # Collections raise instead of lazy loading; queries that need them must
+    # opt in with selectinload() so N+1 loads can't slip in unnoticed
+    borrow_records: List["BorrowRecord"] = Relationship(
+        back_populates="user", sa_relationship_kwargs={"lazy": "raise"}
+    )
 
 
 class BookAuthorLink(SQLModel, table=True):
@@ -48,57 +181,121 @@ class BookAuthorLink(SQLModel, table=True):
         default=None, foreign_key="books.id", primary_key=True
     )
     author_id: Optional[int] = Field(
-        default=None, foreign_key="authors.id", primary_key=True
+        default=None, foreign_key="authors.id", primary_key=True, index=True
     )
 
 
 class Author(AuthorSchema, table=True):
     __tablename__ = "authors"
+    __mapper_args__ = {"eager_defaults": True}
 
     id: int = Field(primary_key=True)
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: Optional[datetime] = Field(default=None)
+    created_at: Optional[datetime] = Field(
+        default=None,
+        nullable=False,
+        sa_type=UTCDateTime,
+        sa_column_kwargs={"server_default": DB_NOW},
+    )
+    updated_at: Optional[datetime] = Field(
+        default=None, sa_type=UTCDateTime, sa_column_kwargs={"onupdate": DB_NOW}
+    )
 
     # Relationships
     books: List["Book"] = Relationship(
-        back_populates="authors", link_model=BookAuthorLink
+        back_populates="authors",
+        link_model=BookAuthorLink,
+        sa_relationship_kwargs={"lazy": "raise"},
     )
 
 
 class Book(BookSchema, table=True):
     __tablename__ = "books"
+    __table_args__ = (Index("ix_books_status", "status"),)
+    __mapper_args__ = {"eager_defaults": True}
 
     id: Optional[int] = Field(default=None, primary_key=True)
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: Optional[datetime] = Field(
+        default=None,
+        nullable=False,
+        sa_type=UTCDateTime,
+        sa_column_kwargs={"server_default": DB_NOW},
+    )
+    updated_at: Optional[datetime] = Field(
+        default=None,
+        nullable=False,
+        sa_type=UTCDateTime,
+        sa_column_kwargs={"server_default": DB_NOW, "onupdate": DB_NOW},
+    )
 
     # Relationships
     authors: List[Author] = Relationship(
-        back_populates="books", link_model=BookAuthorLink
+        back_populates="books",
+        link_model=BookAuthorLink,
+        sa_relationship_kwargs={"lazy": "raise"},
+    )
+    borrow_records: List["BorrowRecord"] = Relationship(
+        back_populates="book", sa_relationship_kwargs={"lazy": "raise"}
     )
-    borrow_records: List["BorrowRecord"] = Relationship(back_populates="book")
 
 
 class BorrowRecord(BorrowRecordSchema, table=True):
     __tablename__ = "borrow_records"
+    __table_args__ = (
+        # Open loans by due date, for the overdue / due-soon lookups.
+        # returned_date is included so overdue counts are index-only.
+        Index(
+            "ix_borrow_records_open_due_date",
+            "due_date",
+            "returned_date",
+            sqlite_where=text("returned_date IS NULL"),
+        ),
+        # A user's active loans (returned_date IS NULL) without a table scan
+        Index("ix_borrow_records_user_id_returned_date", "user_id", "returned_date"),
+        # Most recent loans first, for listings and stats
+        Index("ix_borrow_records_borrowed_date", "borrowed_date"),
+    )
+    model_config = ConfigDict(ignored_types=(hybrid_method,))
 
     id: Optional[int] = Field(default=None, primary_key=True)
+    borrowed_date: datetime = Field(default_factory=utc_now, sa_type=UTCDateTime)
+    returned_date: Optional[datetime] = Field(default=None, sa_type=UTCDateTime)
     user_id: int = Field(foreign_key="users.id", index=True)
     book_id: int = Field(foreign_key="books.id", index=True)
 
     # Relationships
-    user: Optional[User] = Relationship(back_populates="borrow_records")
-    book: Optional[Book] = Relationship(back_populates="borrow_records")
+    # Always needed by BorrowRecordReadSchema, so load them with the record
+    user: Optional[User] = Relationship(
+        back_populates="borrow_records", sa_relationship_kwargs={"lazy": "selectin"}
+    )
+    book: Optional[Book] = Relationship(
+        back_populates="borrow_records", sa_relationship_kwargs={"lazy": "selectin"}
+    )
 
-    # Computed properties
-    @property
-    def is_overdue(self) -> bool:
+    # Usable on instances and in queries, e.g. where(BorrowRecord.is_overdue_at(d))
+    @hybrid_method
+    def is_overdue_at(self, today: date) -> bool:
         if self.returned_date:
             return False
-        return date.today() > self.due_date
+        return today > self.due_date
 
-    @property
-    def days_overdue(self) -> int:
-        if not self.is_overdue:
+    @is_overdue_at.inplace.expression
+    @classmethod
+    def _is_overdue_at_expression(cls, today: date):
+        return and_(cls.returned_date.is_(None), cls.due_date < today)
+
+    @hybrid_method
+    def days_overdue_at(self, today: date) -> int:
+        if not self.is_overdue_at(today):
             return 0
-        return (date.today() - self.due_date).days
+        return (today - self.due_date).days
+
+    @days_overdue_at.inplace.expression
+    @classmethod
+    def _days_overdue_at_expression(cls, today: date):
+        return case(
+            (
+                cls.is_overdue_at(today),
+                cast(func.julianday(today) - func.julianday(cls.due_date), Integer),
+            ),
+            else_=0,
+        )
@@ -1,16 +1,41 @@
+from contextlib import asynccontextmanager
 from datetime import date
 
 from fastapi import Depends, FastAPI
 from scalar_fastapi import get_scalar_api_reference
-from sqlmodel import Session, and_, func, select
-
-from app.database import Author, Book, BorrowRecord, User, get_session
+from sqlmodel import Session, func, select
+
+from app.auth import shutdown_hash_pool, warm_hash_pool
+from app.database import (
+    Author,
+    Book,
+    BorrowRecord,
+    User,
+    get_session,
+    get_today,
+    warm_db_pool,
+)
+from app.responses import AppJSONResponse
 from app.routes import auth, authors, books, borrow_record, users
 from app.schema import BookStatus, LibraryStatsSchema
 from app.settings import settings
 
-app = FastAPI(title=settings.APP_NAME, version=settings.APP_VERSION)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm up shared resources on startup and release them on shutdown"""
+    warm_hash_pool()
+    warm_db_pool()
+    yield
+    shutdown_hash_pool()
+
+
+app = FastAPI(
+    title=settings.APP_NAME,
+    version=settings.APP_VERSION,
+    lifespan=lifespan,
+    default_response_class=AppJSONResponse,
+)
 
 
 # Include routers with prefixes and tags
@@ -53,46 +78,42 @@ def health_check():
 
 
 @app.get("/api/v1/stats", response_model=LibraryStatsSchema)
-def get_library_stats(session: Session = Depends(get_session)):
+def get_library_stats(
+    today: date = Depends(get_today), session: Session = Depends(get_session)
+):
     """
     Get overall library statistics
     """
-    total_books = session.exec(select(func.count(Book.id))).first()
-    total_authors = session.exec(select(func.count(Author.id))).first()
-    total_users = session.exec(select(func.count(User.id))).first()
-
-    books_borrowed = session.exec(
-        select(func.count(Book.id)).where(Book.status == BookStatus.BORROWED)
-    ).first()
-
-    books_available = session.exec(
-        select(func.count(Book.id)).where(Book.status == BookStatus.AVAILABLE)
-    ).first()
-
-    overdue_books = session.exec(
-        select(func.count(BorrowRecord.id)).where(
-            and_(
-                BorrowRecord.returned_date.is_(None),
-                BorrowRecord.due_date < date.today(),
+    stats = (
+        session.exec(
+            select(
+                select(func.count(Book.id)).scalar_subquery().label("total_books"),
+                select(func.count(Author.id)).scalar_subquery().label("total_authors"),
+                select(func.count(User.id)).scalar_subquery().label("total_users"),
+                select(func.count(Book.id))
+                .where(Book.status == BookStatus.BORROWED)
+                .scalar_subquery()
+                .label("books_borrowed"),
+                select(func.count(Book.id))
+                .where(Book.status == BookStatus.AVAILABLE)
+                .scalar_subquery()
+                .label("books_available"),
+                select(func.count(BorrowRecord.id))
+                .where(BorrowRecord.is_overdue_at(today))
+                .scalar_subquery()
+                .label("overdue_books"),
+                select(func.coalesce(func.sum(BorrowRecord.fine_amount), 0))
+                .where(BorrowRecord.fine_amount.isnot(None))
+                .scalar_subquery()
+                .label("total_fines"),
             )
         )
-    ).first()
-
-    total_fines = session.exec(
-        select(func.coalesce(func.sum(BorrowRecord.fine_amount), 0)).where(
-            BorrowRecord.fine_amount.isnot(None)
-        )
-    ).first()
-
-    return LibraryStatsSchema(
-        total_books=total_books,
-        total_authors=total_authors,
-        total_users=total_users,
-        books_borrowed=books_borrowed,
-        books_available=books_available,
-        overdue_books=overdue_books,
-        total_fines=float(total_fines),
+        .one()
+        ._asdict()
     )
+    stats["total_fines"] = float(stats["total_fines"])
+
+    return LibraryStatsSchema(**stats)
 
 
 @app.get("/scalar", include_in_schema=False)
@@ -0,0 +1,9 @@
+import orjson
+from fastapi.responses import ORJSONResponse
+
+
+class AppJSONResponse(ORJSONResponse):
+    """ORJSONResponse writing UTC datetimes with a "Z" suffix, as pydantic does"""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z)
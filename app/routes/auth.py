@@ -1,5 +1,7 @@
 # File: routers/auth.py
 from fastapi import APIRouter, Depends, Form, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import Session
 
 from app.auth import authenticate_user, check_email_exists, get_password_hash
@@ -10,7 +12,7 @@ router = APIRouter()
 
 
 @router.post("/login", response_model=UserReadSchema)
-def login(
+async def login(
     email: str = Form(...),
     password: str = Form(...),
     session: Session = Depends(get_session),
@@ -18,7 +20,7 @@ def login(
     """
     Simple login - authenticate user and return user data
     """
-    user = authenticate_user(session, email, password)
+    user = await authenticate_user(session, email, password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -29,25 +31,27 @@ def login(
 
 
 @router.post("/register", response_model=UserReadSchema)
-def register(user_data: UserCreateSchema, session: Session = Depends(get_session)):
+async def register(
+    user_data: UserCreateSchema, session: Session = Depends(get_session)
+):
     """
     Register a new user
     """
-    # Check if user already exists
-    if check_email_exists(session, user_data.email):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered"
-        )
-
     # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await get_password_hash(user_data.password)
     db_user = User(
         **user_data.model_dump(exclude={"password"}), hashed_password=hashed_password
     )
 
+    # Duplicate emails surface as an IntegrityError from the unique index
     session.add(db_user)
-    session.commit()
-    session.refresh(db_user)
+    try:
+        await run_in_threadpool(session.commit)
+    except IntegrityError:
+        await run_in_threadpool(session.rollback)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered"
+        )
 
     return db_user
 
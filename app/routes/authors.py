@@ -1,11 +1,17 @@
 # File: routers/authors.py
-from datetime import datetime
 from typing import List
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlmodel import Session, func, or_, select
-
-from app.database import Author, get_session
+from sqlalchemy.orm import raiseload, selectinload
+from sqlmodel import Session, exists, func, select, update
+
+from app.database import (
+    Author,
+    BookAuthorLink,
+    authors_fts,
+    fts_match_query,
+    get_session,
+)
 from app.schema import (
     AuthorCreateSchema,
     AuthorReadSchema,
@@ -27,7 +33,6 @@ def create_author(
     db_author = Author(**author_data.model_dump())
     session.add(db_author)
     session.commit()
-    session.refresh(db_author)
     return db_author
 
 
@@ -36,7 +41,9 @@ def get_author(author_id: int, session: Session = Depends(get_session)):
     """
     Get a specific author with their books
     """
-    author = session.get(Author, author_id)
+    author = session.exec(
+        select(Author).where(Author.id == author_id).options(selectinload(Author.books))
+    ).first()
     if not author:
         raise HTTPException(status_code=404, detail="Author not found")
     return author
@@ -50,11 +57,19 @@ def list_authors(
     """
     Get list of authors with optional search and pagination
     """
-    query = select(Author)
+    query = select(Author).options(raiseload("*"))
 
     # Apply search filters
     if search_params.name:
-        query = query.where(Author.name.ilike(f"%{search_params.name}%"))
+        query = query.where(
+            Author.id.in_(
+                select(authors_fts.c.rowid).where(
+                    authors_fts.c.authors_fts.match(
+                        fts_match_query(search_params.name, "name")
+                    )
+                )
+            )
+        )
 
     # Add ordering
     query = query.order_by(Author.name)
@@ -75,18 +90,18 @@ def update_author(
     """
     Update an author
     """
-    author = session.get(Author, author_id)
-    if not author:
-        raise HTTPException(status_code=404, detail="Author not found")
-
     # Update only provided fields
     update_data = author_update.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(author, field, value)
+    author = session.exec(
+        update(Author)
+        .where(Author.id == author_id)
+        .values(**update_data)
+        .returning(Author)
+    ).scalar_one_or_none()
+    if not author:
+        raise HTTPException(status_code=404, detail="Author not found")
 
-    author.updated_at = datetime.utcnow()
     session.commit()
-    session.refresh(author)
     return author
 
 
@@ -112,7 +127,10 @@ def delete_author(author_id: int, session: Session = Depends(get_session)):
         raise HTTPException(status_code=404, detail="Author not found")
 
     # Check if author has books
-    if author.books:
+    has_books = session.scalar(
+        select(exists().where(BookAuthorLink.author_id == author_id))
+    )
+    if has_books:
         raise HTTPException(
             status_code=400,
             detail="Cannot delete author with associated books. Remove books first.",
@@ -136,10 +154,10 @@ def search_authors(
     query = (
         select(Author)
         .where(
-            or_(
-                Author.name.ilike(f"%{q}%"),
-                Author.nationality.ilike(f"%{q}%"),
-                Author.biography.ilike(f"%{q}%"),
+            Author.id.in_(
+                select(authors_fts.c.rowid).where(
+                    authors_fts.c.authors_fts.match(fts_match_query(q))
+                )
             )
         )
         .order_by(Author.name)
@@ -156,7 +174,9 @@ def get_author_books(author_id: int, session: Session = Depends(get_session)):
     """
     Get all books by a specific author
     """
-    author = session.get(Author, author_id)
+    author = session.exec(
+        select(Author).where(Author.id == author_id).options(selectinload(Author.books))
+    ).first()
     if not author:
         raise HTTPException(status_code=404, detail="Author not found")
 
@@ -178,7 +198,7 @@ def get_authors_stats(session: Session = Depends(get_session)):
     """
     Get author statistics
     """
-    total_authors = session.exec(select(func.count(Author.id))).first()
+    total_authors = session.scalar(select(func.count(Author.id)))
 
     # Authors by nationality
     nationality_stats = session.exec(
@@ -189,11 +209,12 @@ def get_authors_stats(session: Session = Depends(get_session)):
     ).all()
 
     # Authors with most books
+    book_count = func.count(BookAuthorLink.book_id).label("book_count")
     authors_with_book_count = session.exec(
-        select(Author.name, func.count(Author.books))
-        .join(Author.books)
+        select(Author.name, book_count)
+        .join(BookAuthorLink, BookAuthorLink.author_id == Author.id)
         .group_by(Author.id, Author.name)
-        .order_by(func.count(Author.books).desc())
+        .order_by(book_count.desc())
         .limit(10)
     ).all()
 
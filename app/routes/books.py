@@ -1,9 +1,10 @@
 from typing import List
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session, and_, select
+from sqlalchemy.orm import raiseload, selectinload
+from sqlmodel import Session, and_, select, update
 
-from app.database import Book, get_session
+from app.database import Book, books_fts, fts_match_query, get_session
 from app.schema import (
     BookCreateSchema,
     BookReadSchema,
@@ -21,12 +22,18 @@ def get_books(
     search_params: BookSearchParamsSchema = Depends(),
 ):
     """Get all books with optional filtering"""
-    query = select(Book)
+    query = select(Book).options(selectinload(Book.authors), raiseload("*"))
 
     # Apply filters
     filters = []
     if search_params.title:
-        filters.append(Book.title.ilike(f"%{search_params.title}%"))
+        filters.append(
+            Book.id.in_(
+                select(books_fts.c.rowid).where(
+                    books_fts.c.books_fts.match(fts_match_query(search_params.title))
+                )
+            )
+        )
     if search_params.genre:
         filters.append(Book.genre == search_params.genre)
     if search_params.status:
@@ -47,7 +54,7 @@ def get_books(
 @router.get("/{book_id}", response_model=BookReadWithAuthorsSchema)
 def get_book(book_id: int, session: Session = Depends(get_session)):
     """Get a specific book by ID"""
-    book = session.get(Book, book_id)
+    book = session.get(Book, book_id, options=[selectinload(Book.authors)])
     if not book:
         raise HTTPException(status_code=404, detail="Book not found")
     return book
@@ -62,7 +69,6 @@ def create_book(
     book = Book(**book_data.model_dump(exclude={"author_ids"}))
     session.add(book)
     session.commit()
-    session.refresh(book)
     return book
 
 
@@ -73,17 +79,17 @@ def update_book(
     session: Session = Depends(get_session),
 ):
     """Update a book"""
-    book = session.get(Book, book_id)
+    book_data = book_update.model_dump(exclude_unset=True, exclude={"author_ids"})
+    if book_data:
+        book = session.exec(
+            update(Book).where(Book.id == book_id).values(**book_data).returning(Book)
+        ).scalar_one_or_none()
+    else:
+        book = session.get(Book, book_id)
     if not book:
         raise HTTPException(status_code=404, detail="Book not found")
 
-    book_data = book_update.model_dump(exclude_unset=True)
-    for field, value in book_data.items():
-        setattr(book, field, value)
-
-    session.add(book)
     session.commit()
-    session.refresh(book)
     return book
 
 
@@ -1,94 +1,146 @@
 # File: routers/borrow_records.py
-from datetime import date, datetime, timedelta
+from datetime import date, timedelta
 from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlmodel import Session, and_, func, or_, select
+from sqlalchemy.orm import raiseload, selectinload
+from sqlmodel import (
+    Session,
+    and_,
+    bindparam,
+    case,
+    exists,
+    func,
+    not_,
+    select,
+    update,
+)
 
-from app.database import Book, BorrowRecord, User, get_session
+from app.database import Book, BorrowRecord, User, get_session, get_today
+from app.responses import AppJSONResponse
 from app.schema import (
     BookStatus,
     BorrowRecordCreateSchema,
     BorrowRecordReadSchema,
     BorrowRecordUpdateSchema,
+    utc_now,
 )
 
 router = APIRouter()
 
+MAX_ACTIVE_BORROWS = 5
+
+# All pre-flight checks for a new borrow in one round-trip. Missing users
+# yield no row and missing books a NULL book_id. The two subqueries make this
+# the costliest statement to construct here, so it is built once at import.
+_borrow_preflight_query = (
+    select(
+        User.is_active,
+        Book.id.label("book_id"),
+        Book.status,
+        select(func.count(BorrowRecord.id))
+        .where(
+            and_(
+                BorrowRecord.user_id == bindparam("user_id"),
+                BorrowRecord.returned_date.is_(None),
+            )
+        )
+        .scalar_subquery()
+        .label("active_borrows_count"),
+        exists()
+        .where(
+            and_(
+                BorrowRecord.user_id == bindparam("user_id"),
+                BorrowRecord.is_overdue_at(bindparam("today")),
+            )
+        )
+        .label("has_overdue_books"),
+    )
+    .select_from(User)
+    .join(Book, Book.id == bindparam("book_id"), isouter=True)
+    .where(User.id == bindparam("user_id"))
+)
+
+
+def _serialize(record: BorrowRecord, today: date) -> dict:
+    """Validate a record once, with its overdue fields computed as of `today`"""
+    return BorrowRecordReadSchema.model_validate(
+        record, context={"today": today}
+    ).model_dump()
+
 
 @router.post("/", response_model=BorrowRecordReadSchema)
 def create_borrow_record(
-    borrow_data: BorrowRecordCreateSchema, session: Session = Depends(get_session)
+    borrow_data: BorrowRecordCreateSchema,
+    today: date = Depends(get_today),
+    session: Session = Depends(get_session),
 ):
     """
     Create a new borrow record
     """
+    preflight = session.exec(
+        _borrow_preflight_query,
+        params={
+            "user_id": borrow_data.user_id,
+            "book_id": borrow_data.book_id,
+            "today": today,
+        },
+    ).first()
+
     # Verify user exists and is active
-    user = session.get(User, borrow_data.user_id)
-    if not user:
+    if not preflight:
         raise HTTPException(status_code=404, detail="User not found")
-    if not user.is_active:
+    if not preflight.is_active:
         raise HTTPException(status_code=400, detail="User is not active")
 
     # Verify book exists and is available
-    book = session.get(Book, borrow_data.book_id)
-    if not book:
+    if preflight.book_id is None:
         raise HTTPException(status_code=404, detail="Book not found")
-    if book.status != BookStatus.AVAILABLE:
+    if preflight.status != BookStatus.AVAILABLE:
         raise HTTPException(
             status_code=400,
-            detail=f"Book is not available. Current status: {book.status}",
+            detail=f"Book is not available. Current status: {preflight.status}",
         )
 
     # Check if user has reached borrowing limit (e.g., 5 active borrows)
-    active_borrows_count = session.exec(
-        select(func.count(BorrowRecord.id)).where(
-            and_(
-                BorrowRecord.user_id == borrow_data.user_id,
-                BorrowRecord.returned_date.is_(None),
-            )
-        )
-    ).first()
-
-    MAX_ACTIVE_BORROWS = 5
-    if active_borrows_count >= MAX_ACTIVE_BORROWS:
+    if preflight.active_borrows_count >= MAX_ACTIVE_BORROWS:
         raise HTTPException(
             status_code=400,
             detail=f"User has reached maximum active borrows limit ({MAX_ACTIVE_BORROWS})",
         )
 
     # Check if user has overdue books
-    overdue_books = session.exec(
-        select(BorrowRecord).where(
-            and_(
-                BorrowRecord.user_id == borrow_data.user_id,
-                BorrowRecord.returned_date.is_(None),
-                BorrowRecord.due_date < date.today(),
-            )
-        )
-    ).all()
-
-    if overdue_books:
+    if preflight.has_overdue_books:
         raise HTTPException(
             status_code=400,
             detail="User has overdue books. Cannot borrow new books until returned.",
         )
 
+    # Update book status, unless another request borrowed it in the meantime
+    updated = session.exec(
+        update(Book)
+        .where(
+            and_(Book.id == borrow_data.book_id, Book.status == BookStatus.AVAILABLE)
+        )
+        .values(status=BookStatus.BORROWED)
+    )
+    if not updated.rowcount:
+        raise HTTPException(status_code=400, detail="Book is not available")
+
     # Create borrow record
     db_borrow = BorrowRecord(**borrow_data.model_dump())
     session.add(db_borrow)
 
-    # Update book status
-    book.status = BookStatus.BORROWED
-    book.updated_at = datetime.utcnow()
-
     session.commit()
-    session.refresh(db_borrow)
-    return db_borrow
+    return AppJSONResponse(_serialize(db_borrow, today))
 
 
 @router.get("/{borrow_id}", response_model=BorrowRecordReadSchema)
-def get_borrow_record(borrow_id: int, session: Session = Depends(get_session)):
+def get_borrow_record(
+    borrow_id: int,
+    today: date = Depends(get_today),
+    session: Session = Depends(get_session),
+):
     """
     Get a specific borrow record
     """
@@ -96,7 +148,7 @@ def get_borrow_record(borrow_id: int, session: Session = Depends(get_session)):
     if not borrow_record:
         raise HTTPException(status_code=404, detail="Borrow record not found")
 
-    return borrow_record
+    return AppJSONResponse(_serialize(borrow_record, today))
 
 
 @router.get("/", response_model=List[BorrowRecordReadSchema])
@@ -107,12 +159,17 @@ def list_borrow_records(
     is_overdue: Optional[bool] = Query(None, description="Filter by overdue status"),
     limit: int = Query(20, le=100),
     offset: int = Query(0, ge=0),
+    today: date = Depends(get_today),
     session: Session = Depends(get_session),
 ):
     """
     Get list of borrow records with filtering
     """
-    query = select(BorrowRecord)
+    query = select(BorrowRecord).options(
+        selectinload(BorrowRecord.book),
+        selectinload(BorrowRecord.user),
+        raiseload("*"),
+    )
 
     # Apply filters
     if user_id:
@@ -129,19 +186,9 @@ def list_borrow_records(
 
     if is_overdue is not None:
         if is_overdue:
-            query = query.where(
-                and_(
-                    BorrowRecord.returned_date.is_(None),
-                    BorrowRecord.due_date < date.today(),
-                )
-            )
+            query = query.where(BorrowRecord.is_overdue_at(today))
         else:
-            query = query.where(
-                or_(
-                    BorrowRecord.returned_date.isnot(None),
-                    BorrowRecord.due_date >= date.today(),
-                )
-            )
+            query = query.where(not_(BorrowRecord.is_overdue_at(today)))
 
     # Add ordering
     query = query.order_by(BorrowRecord.borrowed_date.desc())
@@ -150,93 +197,118 @@ def list_borrow_records(
     query = query.offset(offset).limit(limit)
 
     borrow_records = session.exec(query).all()
-    return borrow_records
+    return AppJSONResponse([_serialize(record, today) for record in borrow_records])
 
 
 @router.patch("/{borrow_id}/return", response_model=BorrowRecordReadSchema)
-def return_book(borrow_id: int, session: Session = Depends(get_session)):
+def return_book(
+    borrow_id: int,
+    today: date = Depends(get_today),
+    session: Session = Depends(get_session),
+):
     """
     Mark a book as returned
     """
-    borrow_record = session.get(BorrowRecord, borrow_id)
+    FINE_PER_DAY = 0.50  # $0.50 per day
+    MAX_FINE = 25.00  # Maximum fine of $25
+    now = utc_now()
+
+    # Mark as returned and calculate the fine if overdue in a single statement
+    borrow_record = session.exec(
+        update(BorrowRecord)
+        .where(and_(BorrowRecord.id == borrow_id, BorrowRecord.returned_date.is_(None)))
+        .values(
+            returned_date=now,
+            fine_amount=case(
+                (
+                    BorrowRecord.is_overdue_at(today),
+                    func.min(
+                        BorrowRecord.days_overdue_at(today) * FINE_PER_DAY, MAX_FINE
+                    ),
+                ),
+                else_=BorrowRecord.fine_amount,
+            ),
+        )
+        .returning(BorrowRecord)
+    ).scalar_one_or_none()
     if not borrow_record:
-        raise HTTPException(status_code=404, detail="Borrow record not found")
-
-    if borrow_record.returned_date:
+        if not session.get(BorrowRecord, borrow_id):
+            raise HTTPException(status_code=404, detail="Borrow record not found")
         raise HTTPException(status_code=400, detail="Book already returned")
 
-    # Mark as returned
-    borrow_record.returned_date = datetime.utcnow()
-
-    # Calculate fine if overdue
-    if borrow_record.is_overdue:
-        FINE_PER_DAY = 0.50  # $0.50 per day
-        MAX_FINE = 25.00  # Maximum fine of $25
-        fine_amount = min(borrow_record.days_overdue * FINE_PER_DAY, MAX_FINE)
-        borrow_record.fine_amount = fine_amount
-
     # Update book status to available
-    book = session.get(Book, borrow_record.book_id)
-    book.status = BookStatus.AVAILABLE
-    book.updated_at = datetime.utcnow()
+    session.exec(
+        update(Book)
+        .where(Book.id == borrow_record.book_id)
+        .values(status=BookStatus.AVAILABLE)
+    )
 
     session.commit()
-    session.refresh(borrow_record)
-    return borrow_record
+    return AppJSONResponse(_serialize(borrow_record, today))
 
 
 @router.patch("/{borrow_id}/extend", response_model=BorrowRecordReadSchema)
 def extend_due_date(
     borrow_id: int,
     extend_days: int = Query(..., ge=1, le=30, description="Days to extend (1-30)"),
+    today: date = Depends(get_today),
     session: Session = Depends(get_session),
 ):
     """
     Extend due date for a borrow record
     """
-    borrow_record = session.get(BorrowRecord, borrow_id)
+    # Extend due date
+    borrow_record = session.exec(
+        update(BorrowRecord)
+        .where(and_(BorrowRecord.id == borrow_id, BorrowRecord.returned_date.is_(None)))
+        .values(
+            due_date=func.date(BorrowRecord.due_date, f"+{extend_days} days"),
+            notes=f"Extended by {extend_days} days on {today}",
+        )
+        .returning(BorrowRecord)
+    ).scalar_one_or_none()
     if not borrow_record:
-        raise HTTPException(status_code=404, detail="Borrow record not found")
-
-    if borrow_record.returned_date:
+        if not session.get(BorrowRecord, borrow_id):
+            raise HTTPException(status_code=404, detail="Borrow record not found")
         raise HTTPException(status_code=400, detail="Cannot extend returned book")
 
-    # Extend due date
-    borrow_record.due_date = borrow_record.due_date + timedelta(days=extend_days)
-    borrow_record.notes = f"Extended by {extend_days} days on {date.today()}"
-
     session.commit()
-    session.refresh(borrow_record)
-    return borrow_record
+    return AppJSONResponse(_serialize(borrow_record, today))
 
 
 @router.patch("/{borrow_id}", response_model=BorrowRecordReadSchema)
 def update_borrow_record(
     borrow_id: int,
     borrow_update: BorrowRecordUpdateSchema,
+    today: date = Depends(get_today),
     session: Session = Depends(get_session),
 ):
     """
     Update a borrow record
     """
-    borrow_record = session.get(BorrowRecord, borrow_id)
-    if not borrow_record:
-        raise HTTPException(status_code=404, detail="Borrow record not found")
-
     # Update only provided fields
     update_data = borrow_update.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(borrow_record, field, value)
+    if update_data:
+        borrow_record = session.exec(
+            update(BorrowRecord)
+            .where(BorrowRecord.id == borrow_id)
+            .values(**update_data)
+            .returning(BorrowRecord)
+        ).scalar_one_or_none()
+    else:
+        borrow_record = session.get(BorrowRecord, borrow_id)
+    if not borrow_record:
+        raise HTTPException(status_code=404, detail="Borrow record not found")
 
     session.commit()
-    session.refresh(borrow_record)
-    return borrow_record
+    return AppJSONResponse(_serialize(borrow_record, today))
 
 
 @router.get("/overdue/", response_model=List[BorrowRecordReadSchema])
 def get_overdue_records(
     limit: int = Query(50, le=200),
     offset: int = Query(0, ge=0),
+    today: date = Depends(get_today),
     session: Session = Depends(get_session),
 ):
     """
@@ -244,19 +316,14 @@ def get_overdue_records(
     """
     query = (
         select(BorrowRecord)
-        .where(
-            and_(
-                BorrowRecord.returned_date.is_(None),
-                BorrowRecord.due_date < date.today(),
-            )
-        )
+        .where(BorrowRecord.is_overdue_at(today))
         .order_by(BorrowRecord.due_date)
         .offset(offset)
         .limit(limit)
     )
 
     overdue_records = session.exec(query).all()
-    return overdue_records
+    return AppJSONResponse([_serialize(record, today) for record in overdue_records])
 
 
 @router.get("/due-soon/", response_model=List[BorrowRecordReadSchema])
@@ -264,12 +331,13 @@ def get_due_soon_records(
     days: int = Query(3, ge=1, le=7, description="Books due within X days"),
     limit: int = Query(50, le=200),
     offset: int = Query(0, ge=0),
+    today: date = Depends(get_today),
     session: Session = Depends(get_session),
 ):
     """
     Get borrow records due soon
     """
-    due_date_limit = date.today() + timedelta(days=days)
+    due_date_limit = today + timedelta(days=days)
 
     query = (
         select(BorrowRecord)
@@ -277,7 +345,7 @@ def get_due_soon_records(
             and_(
                 BorrowRecord.returned_date.is_(None),
                 BorrowRecord.due_date <= due_date_limit,
-                BorrowRecord.due_date >= date.today(),
+                BorrowRecord.due_date >= today,
             )
         )
         .order_by(BorrowRecord.due_date)
@@ -286,43 +354,46 @@ def get_due_soon_records(
     )
 
     due_soon_records = session.exec(query).all()
-    return due_soon_records
+    return AppJSONResponse([_serialize(record, today) for record in due_soon_records])
 
 
 @router.get("/stats/", response_model=dict)
-def get_borrow_stats(session: Session = Depends(get_session)):
+def get_borrow_stats(
+    today: date = Depends(get_today), session: Session = Depends(get_session)
+):
     """
     Get borrowing statistics
     """
-    total_borrows = session.exec(select(func.count(BorrowRecord.id))).first()
-    active_borrows = session.exec(
-        select(func.count(BorrowRecord.id)).where(BorrowRecord.returned_date.is_(None))
-    ).first()
-
-    overdue_count = session.exec(
-        select(func.count(BorrowRecord.id)).where(
-            and_(
-                BorrowRecord.returned_date.is_(None),
-                BorrowRecord.due_date < date.today(),
-            )
-        )
-    ).first()
-
-    total_fines = session.exec(
-        select(func.coalesce(func.sum(BorrowRecord.fine_amount), 0)).where(
-            BorrowRecord.fine_amount.isnot(None)
-        )
-    ).first()
-
-    # Average borrow duration
-    avg_duration = session.exec(
+    stats = session.exec(
         select(
-            func.avg(
-                func.julianday(BorrowRecord.returned_date)
-                - func.julianday(BorrowRecord.borrowed_date)
+            select(func.count(BorrowRecord.id))
+            .scalar_subquery()
+            .label("total_borrows"),
+            select(func.count(BorrowRecord.id))
+            .where(BorrowRecord.returned_date.is_(None))
+            .scalar_subquery()
+            .label("active_borrows"),
+            select(func.count(BorrowRecord.id))
+            .where(BorrowRecord.is_overdue_at(today))
+            .scalar_subquery()
+            .label("overdue_count"),
+            select(func.coalesce(func.sum(BorrowRecord.fine_amount), 0))
+            .where(BorrowRecord.fine_amount.isnot(None))
+            .scalar_subquery()
+            .label("total_fines"),
+            # Average borrow duration
+            select(
+                func.avg(
+                    func.julianday(BorrowRecord.returned_date)
+                    - func.julianday(BorrowRecord.borrowed_date)
+                )
             )
-        ).where(BorrowRecord.returned_date.isnot(None))
-    ).first()
+            .where(BorrowRecord.returned_date.isnot(None))
+            .scalar_subquery()
+            .label("avg_duration"),
+        )
+    ).one()
+    total_borrows, active_borrows, overdue_count, total_fines, avg_duration = stats
 
     # Most borrowed books
     most_borrowed = session.exec(
@@ -357,9 +428,11 @@ def delete_borrow_record(borrow_id: int, session: Session = Depends(get_session)
 
     # If the book wasn't returned, mark it as available
     if not borrow_record.returned_date:
-        book = session.get(Book, borrow_record.book_id)
-        book.status = BookStatus.AVAILABLE
-        book.updated_at = datetime.utcnow()
+        session.exec(
+            update(Book)
+            .where(Book.id == borrow_record.book_id)
+            .values(status=BookStatus.AVAILABLE)
+        )
 
     session.delete(borrow_record)
     session.commit()
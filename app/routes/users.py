@@ -1,39 +1,82 @@
 # File: routers/users.py
-from datetime import datetime
-from typing import List
+import base64
+import binascii
+from typing import Optional, Tuple
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlmodel import Session, and_, or_, select
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import (
+    Session,
+    and_,
+    exists,
+    or_,
+    select,
+    tuple_,
+    update,
+)
 
-from app.auth import check_email_exists, get_password_hash
-from app.database import User, get_session
+from app.auth import get_password_hash
+from app.database import (
+    TRIGRAM_MIN_LENGTH,
+    BorrowRecord,
+    User,
+    fts_substring_query,
+    get_session,
+    users_fts,
+)
+from app.responses import AppJSONResponse
 from app.schema import (
     UserCreateSchema,
+    UserPageSchema,
     UserReadSchema,
     UserRole,
+    UserSearchPageSchema,
     UserUpdateSchema,
 )
 
 router = APIRouter()
 
+# Only the columns UserReadSchema exposes (never hashed_password), so listings
+# can be serialized straight from the rows without re-validating them
+USER_READ_COLUMNS = tuple(getattr(User, field) for field in UserReadSchema.model_fields)
+
+
+def _encode_cursor(name: str, user_id: int) -> str:
+    """Encode the last row's sort key as an opaque page cursor"""
+    return base64.urlsafe_b64encode(f"{name}|{user_id}".encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> Tuple[str, int]:
+    """Decode a page cursor back into its (name, id) sort key"""
+    try:
+        name, user_id = (
+            base64.urlsafe_b64decode(cursor.encode()).decode().rsplit("|", 1)
+        )
+        return name, int(user_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
 
 @router.post("/", response_model=UserReadSchema)
-def create_user(user_data: UserCreateSchema, session: Session = Depends(get_session)):
+async def create_user(
+    user_data: UserCreateSchema, session: Session = Depends(get_session)
+):
     """
     Create a new user
     """
-    # Check if user already exists
-    if check_email_exists(session, user_data.email):
-        raise HTTPException(status_code=400, detail="Email already registered")
-
     # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await get_password_hash(user_data.password)
     user_dict = user_data.model_dump(exclude={"password"})
     db_user = User(**user_dict, hashed_password=hashed_password)
 
+    # The unique index on email rejects duplicates, so no separate lookup
     session.add(db_user)
-    session.commit()
-    session.refresh(db_user)
+    try:
+        await run_in_threadpool(session.commit)
+    except IntegrityError:
+        await run_in_threadpool(session.rollback)
+        raise HTTPException(status_code=400, detail="Email already registered")
     return db_user
 
 
@@ -48,18 +91,25 @@ def get_user(user_id: int, session: Session = Depends(get_session)):
     return user
 
 
-@router.get("/", response_model=List[UserReadSchema])
+@router.get("/", response_model=UserPageSchema)
 def list_users(
     role: UserRole = Query(None, description="Filter by user role"),
     is_active: bool = Query(None, description="Filter by active status"),
-    limit: int = Query(20, le=100),
-    offset: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor of the last page"),
     session: Session = Depends(get_session),
 ):
     """
-    Get list of users with optional filtering
+    Get a page of users with optional filtering, ordered by name.
+    Pass the returned next_cursor to fetch the following page.
+
+    No total is computed per page, so listing stays cheap however many users
+    match the filters.
+
+    Rows are serialized straight to JSON without being re-validated against
+    UserPageSchema, trading response-shape checking for throughput.
     """
-    query = select(User)
+    query = select(*USER_READ_COLUMNS)
 
     # Apply filters
     if role:
@@ -68,14 +118,31 @@ def list_users(
     if is_active is not None:
         query = query.where(User.is_active == is_active)
 
+    # Keyset pagination: continue after the last (name, id) seen
+    if cursor:
+        query = query.where(
+            tuple_(User.name, User.id) > tuple_(*_decode_cursor(cursor))
+        )
+
     # Add ordering
-    query = query.order_by(User.full_name)
+    query = query.order_by(User.name, User.id)
 
-    # Add pagination
-    query = query.offset(offset).limit(limit)
+    # Fetch one extra row to know whether another page exists
+    users = [dict(row) for row in session.exec(query.limit(limit + 1)).mappings()]
 
-    users = session.exec(query).all()
-    return users
+    has_more = len(users) > limit
+    users = users[:limit]
+    next_cursor = (
+        _encode_cursor(users[-1]["name"], users[-1]["id"]) if has_more else None
+    )
+    return AppJSONResponse(
+        {
+            "data": users,
+            "limit": limit,
+            "has_more": has_more,
+            "next_cursor": next_cursor,
+        }
+    )
 
 
 @router.put("/{user_id}", response_model=UserReadSchema)
@@ -85,18 +152,15 @@ def update_user(
     """
     Update a user
     """
-    user = session.get(User, user_id)
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-
     # Update only provided fields
     update_data = user_update.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(user, field, value)
+    user = session.exec(
+        update(User).where(User.id == user_id).values(**update_data).returning(User)
+    ).scalar_one_or_none()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
 
-    user.updated_at = datetime.utcnow()
     session.commit()
-    session.refresh(user)
     return user
 
 
@@ -120,13 +184,18 @@ def delete_user(user_id: int, session: Session = Depends(get_session)):
         raise HTTPException(status_code=404, detail="User not found")
 
     # Check if user has active borrow records
-    active_borrows = session.exec(
-        select(BorrowRecord).where(
-            and_(BorrowRecord.user_id == user_id, BorrowRecord.returned_date.is_(None))
+    has_active_borrows = session.scalar(
+        select(
+            exists().where(
+                and_(
+                    BorrowRecord.user_id == user_id,
+                    BorrowRecord.returned_date.is_(None),
+                )
+            )
         )
-    ).all()
+    )
 
-    if active_borrows:
+    if has_active_borrows:
         raise HTTPException(
             status_code=400, detail="Cannot delete user with active borrow records"
         )
@@ -141,14 +210,16 @@ def deactivate_user(user_id: int, session: Session = Depends(get_session)):
     """
     Deactivate a user
     """
-    user = session.get(User, user_id)
-    if not user:
+    updated_id = session.exec(
+        update(User)
+        .where(User.id == user_id)
+        .values(is_active=False)
+        .returning(User.id)
+    ).scalar_one_or_none()
+    if updated_id is None:
         raise HTTPException(status_code=404, detail="User not found")
 
-    user.is_active = False
-    user.updated_at = datetime.utcnow()
     session.commit()
-    session.refresh(user)
     return {"message": "User deactivated successfully"}
 
 
@@ -157,27 +228,56 @@ def activate_user(user_id: int, session: Session = Depends(get_session)):
     """
     Activate a user
     """
-    user = session.get(User, user_id)
-    if not user:
+    updated_id = session.exec(
+        update(User).where(User.id == user_id).values(is_active=True).returning(User.id)
+    ).scalar_one_or_none()
+    if updated_id is None:
         raise HTTPException(status_code=404, detail="User not found")
 
-    user.is_active = True
-    user.updated_at = datetime.utcnow()
     session.commit()
-    session.refresh(user)
     return {"message": "User activated successfully"}
 
 
-@router.get("/search/", response_model=List[UserReadSchema])
-def search_users(q: str = Query(..., min_length=2, description="Search query")):
+@router.get("/search/", response_model=UserSearchPageSchema)
+def search_users(
+    q: str = Query(..., min_length=2, max_length=64, description="Search query"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    session: Session = Depends(get_session),
+):
     """
     Search users by name or email
     """
+    if len(q) >= TRIGRAM_MIN_LENGTH:
+        condition = User.id.in_(
+            select(users_fts.c.rowid).where(
+                users_fts.c.users_fts.match(fts_substring_query(q))
+            )
+        )
+    else:
+        # Too short for the trigram index. Escape LIKE wildcards so % and _ in
+        # q match literally
+        escaped = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        pattern = f"%{escaped}%"
+        condition = or_(
+            User.name.ilike(pattern, escape="\\"),
+            User.email.ilike(pattern, escape="\\"),
+        )
+
+    # Fetch one extra row to know whether another page exists
     query = (
-        select(User)
-        .where(or_(User.full_name.ilike(f"%{q}%"), User.email.ilike(f"%{q}%")))
-        .order_by(User.full_name)
+        select(*USER_READ_COLUMNS)
+        .where(condition)
+        .order_by(User.name)
+        .offset(offset)
+        .limit(limit + 1)
     )
 
-    users = session.exec(query).all()
-    return users
+    users = [dict(row) for row in session.exec(query).mappings()]
+    return AppJSONResponse(
+        {
+            "data": users[:limit],
+            "limit": limit,
+            "has_more": len(users) > limit,
+        }
+    )
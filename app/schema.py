@@ -1,12 +1,27 @@
-import re
-from datetime import date, datetime
+from datetime import UTC, date, datetime
 from enum import Enum
-from typing import List, Optional
-
-from pydantic import EmailStr, Field, validator
+from typing import Any, List, Optional
+
+from pydantic import (
+    EmailStr,
+    Field,
+    ValidationInfo,
+    field_validator,
+    model_validator,
+)
 from sqlmodel import SQLModel
 
 
+def utc_now() -> datetime:
+    """Current time as an aware UTC datetime"""
+    return datetime.now(UTC)
+
+
+def as_utc(value: datetime) -> datetime:
+    """Attach UTC to naive datetimes so they compare with aware ones"""
+    return value if value.tzinfo else value.replace(tzinfo=UTC)
+
+
 class UserRole(str, Enum):
     ADMIN = "admin"
     LIBRARIAN = "librarian"
@@ -64,14 +79,14 @@ class AuthorUpdateSchema(SQLModel):
 
 class UserSchema(SQLModel):
     name: str = Field(..., min_length=4, max_length=100)
-    email: EmailStr = Field(unique=True)
+    email: EmailStr
     role: UserRole = Field(default=UserRole.MEMBER)
     is_active: bool = Field(default=True)
 
 
 class BookSchema(SQLModel):
     title: str = Field(..., min_length=2, max_length=100)
-    pages: int = Field(gte=0, lte=10000)
+    pages: int = Field(ge=0, le=10000)
     language: Optional[str] = Field(default="English", max_length=50)
     description: Optional[str] = Field(None, max_length=1000)
     genre: Optional[Genre] = Field(default=None)
@@ -79,29 +94,37 @@ class BookSchema(SQLModel):
 
 
 class BorrowRecordSchema(SQLModel):
-    borrowed_date: datetime = Field(default_factory=datetime.utcnow)
+    borrowed_date: datetime = Field(default_factory=utc_now)
     due_date: date
     returned_date: Optional[datetime] = None
     fine_amount: Optional[float] = Field(None, ge=0)
     notes: Optional[str] = Field(None, max_length=500)
 
-    @validator("due_date")
-    def validate_due_date(cls, v, values):
-        if "borrowed_date" in values:
-            if v <= values["borrowed_date"].date():
+    @field_validator("borrowed_date")
+    @classmethod
+    def validate_borrowed_date(cls, v):
+        return as_utc(v)
+
+    @field_validator("due_date")
+    @classmethod
+    def validate_due_date(cls, v, info: ValidationInfo):
+        if "borrowed_date" in info.data:
+            if v <= info.data["borrowed_date"].date():
                 raise ValueError("Due date must be after borrowed date")
         return v
 
-    @validator("returned_date")
-    def validate_returned_date(cls, v, values):
-        if v and "borrowed_date" in values:
-            if v < values["borrowed_date"]:
+    @field_validator("returned_date")
+    @classmethod
+    def validate_returned_date(cls, v, info: ValidationInfo):
+        if v:
+            v = as_utc(v)
+            if "borrowed_date" in info.data and v < info.data["borrowed_date"]:
                 raise ValueError("Returned date must be after borrowed date")
         return v
 
 
 class BookCreateSchema(BookSchema):
-    author_ids: List[int] = Field(min_items=1)
+    author_ids: List[int] = Field(min_length=1)
 
 
 class BookUpdateSchema(SQLModel):
@@ -136,19 +159,18 @@ class BookSummarySchema(SQLModel):
 class UserCreateSchema(UserSchema):
     password: str = Field(min_length=8)
 
-    @validator("password")
+    @field_validator("password")
+    @classmethod
     def validate_password(cls, v):
-        if not re.search(r"[A-Za-z]", v):
+        if not any(c.isascii() and c.isalpha() for c in v):
             raise ValueError("Password must contain at least one letter")
-        if not re.search(r"\d", v):
+        if not any(c.isdecimal() for c in v):
             raise ValueError("Password must contain at least one digit")
         return v
 
 
 class UserUpdateSchema(SQLModel):
-    full_name: Optional[str] = Field(None, min_length=2, max_length=100)
-    phone: Optional[str] = Field(None, pattern=r"^\+?[\d\s\-\(\)]{8,15}$")
-    address: Optional[str] = Field(None, max_length=200)
+    name: Optional[str] = Field(None, min_length=4, max_length=100)
     is_active: Optional[bool] = None
 
 
@@ -179,6 +201,23 @@ class BorrowRecordReadSchema(BorrowRecordSchema):
     is_overdue: bool
     days_overdue: int
 
+    @model_validator(mode="before")
+    @classmethod
+    def compute_overdue(cls, data: Any, info: ValidationInfo):
+        # Overdue state depends on the request's date, passed in as
+        # context={"today": ...}, rather than on the clock at render time
+        if not hasattr(data, "is_overdue_at"):
+            return data
+        if not info.context or "today" not in info.context:
+            raise ValueError('Borrow records are validated with context={"today": ...}')
+        today = info.context["today"]
+        fields = cls.model_fields.keys() - {"is_overdue", "days_overdue"}
+        return {
+            **{name: getattr(data, name) for name in fields},
+            "is_overdue": data.is_overdue_at(today),
+            "days_overdue": data.days_overdue_at(today),
+        }
+
 
 # Authentication schemas
 # class TokenSchema(SQLModel):
@@ -213,6 +252,22 @@ class AuthorSearchParamsSchema(SQLModel):
     offset: int = Field(default=0, ge=0)
 
 
+# Pagination schemas
+# No total count: pages are sized by fetching one row past `limit`
+class UserPageSchema(SQLModel):
+    data: List[UserReadSchema]
+    limit: int
+    has_more: bool
+    next_cursor: Optional[str] = None
+
+
+# Search pages by offset, so there is no cursor to hand back
+class UserSearchPageSchema(SQLModel):
+    data: List[UserReadSchema]
+    limit: int
+    has_more: bool
+
+
 # Statistics schemas
 class LibraryStatsSchema(SQLModel):
     total_books: int
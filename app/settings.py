@@ -1,8 +1,15 @@
+import os
+
+
 class Settings:
     APP_NAME = "Books Library"
     APP_VERSION = "1.0.0"
     DOC_URL = None
     REDOC_URL = None
+    SQL_ECHO = os.getenv("SQL_ECHO", "false").lower() in ("1", "true", "yes")
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "20"))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
 
 
 settings = Settings()